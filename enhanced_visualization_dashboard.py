@@ -1,10 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
+import pyarrow as pa
 import os
-from datetime import datetime
+import contextlib
+import json
+import hashlib
+import re
+import logging
+# plotly is imported inside the chart builders and datetime inside main(), so
+# the sidebar and uploader paint before plotly loads; the first chart render
+# pays the import once and Python's module cache serves later reruns
 
 # Set page config
 st.set_page_config(
@@ -14,6 +20,21 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Opt-in polars CSV reader (set HR_DASHBOARD_USE_POLARS=1 with polars installed)
+USE_POLARS = os.environ.get("HR_DASHBOARD_USE_POLARS", "").lower() in ("1", "true", "yes")
+
+# Opt-in column pruning (set HR_DASHBOARD_DETECTED_COLUMNS_ONLY=1): parse only
+# the detected and 'Pers' columns, so the detailed table shows just those
+DETECTED_COLUMNS_ONLY = os.environ.get("HR_DASHBOARD_DETECTED_COLUMNS_ONLY", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+# Opt-in parquet side-cache (set HR_DASHBOARD_PARQUET_CACHE to a directory):
+# parsed files are persisted there, keyed on content hash, so new sessions and
+# restarts skip re-parsing. Off by default because it writes employee data to disk
+PARQUET_CACHE_DIR = os.environ.get("HR_DASHBOARD_PARQUET_CACHE", "")
+PARQUET_CACHE_MAX_FILES = 8
+
 # Apply custom CSS
 def apply_custom_css():
     """Apply custom CSS styling"""
@@ -75,32 +96,194 @@ def apply_custom_css():
     """
     st.markdown(css, unsafe_allow_html=True)
 
+# Function to rewind a file object before retrying a read
+def _rewind(source):
+    """Seek an uploaded file back to the start; paths are left untouched"""
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+# Function to read a CSV file with the fastest available engine
+def _read_csv(source, usecols=None):
+    """Read CSV via polars (opt-in) or pyarrow, falling back to the C engine"""
+    if usecols is None:
+        usecols = _dashboard_usecols(source, is_csv=True)
+    if USE_POLARS:
+        try:
+            import polars as pl
+            return pl.read_csv(source, columns=usecols).to_pandas(use_pyarrow_extension_array=True)
+        except Exception:
+            _rewind(source)
+    try:
+        return pd.read_csv(source, engine="pyarrow", dtype_backend="pyarrow", usecols=usecols)
+    except Exception:
+        _rewind(source)
+        return pd.read_csv(source, usecols=usecols)
+
+# Function to read an Excel file with the fastest available engine
+def _read_excel(source, usecols=None):
+    """Read Excel via calamine, falling back to the default engine"""
+    if usecols is None:
+        usecols = _dashboard_usecols(source, is_csv=False)
+    try:
+        return pd.read_excel(source, engine="calamine", usecols=usecols)
+    except (ImportError, ValueError):
+        _rewind(source)
+        return pd.read_excel(source, usecols=usecols)
+
+# Function to pick the columns the dashboard consumes from the header row
+def _dashboard_usecols(source, is_csv):
+    """Return detected and 'Pers' columns to parse, or None for a full read"""
+    if not DETECTED_COLUMNS_ONLY:
+        return None
+    try:
+        if is_csv:
+            header = pd.read_csv(source, nrows=0)
+        else:
+            try:
+                header = pd.read_excel(source, engine="calamine", nrows=0)
+            except (ImportError, ValueError):
+                _rewind(source)
+                header = pd.read_excel(source, nrows=0)
+    finally:
+        _rewind(source)
+    
+    lower_cols = _lower_cols(header)
+    detected = {
+        detect_department_column(header, lower_cols),
+        detect_job_family_column(header, lower_cols),
+        detect_employee_group_column(header, lower_cols),
+        detect_joining_date_column(header, lower_cols),
+    }
+    detected.discard(None)
+    if not detected:
+        return None
+    
+    # CSV engines take names (pyarrow rejects positions); Excel takes
+    # positions so non-string header cells still match
+    keep = [i for i, col in enumerate(header.columns) if col in detected or 'Pers' in str(col)]
+    return [header.columns[i] for i in keep] if is_csv else keep
+
 # Function to load data
 def load_data(file_path):
-    """Load data from Excel or CSV file"""
+    """Load data from Excel or CSV file, cached across reruns"""
+    # Uploaded file objects carry their name; plain paths are the name
+    file_name = file_path if isinstance(file_path, str) else getattr(file_path, 'name', '')
+    if not (file_name.endswith('.csv') or file_name.endswith('.xlsx') or file_name.endswith('.xls')):
+        st.error(f"Unsupported file format: {file_name}")
+        return None
+    
+    # Errors are reported here, outside the cache, so a failed parse is
+    # retried on the next rerun instead of being memoized as None
     try:
-        if isinstance(file_path, str):
-            if file_path.endswith('.csv'):
-                return pd.read_csv(file_path)
-            elif file_path.endswith('.xlsx') or file_path.endswith('.xls'):
-                return pd.read_excel(file_path)
-            else:
-                st.error(f"Unsupported file format: {file_path}")
-                return None
-        else:
-            # Assume it's an uploaded file object
-            file_name = getattr(file_path, 'name', '')
-            if file_name.endswith('.csv'):
-                return pd.read_csv(file_path)
-            elif file_name.endswith('.xlsx') or file_name.endswith('.xls'):
-                return pd.read_excel(file_path)
-            else:
-                st.error(f"Unsupported file format: {file_name}")
-                return None
+        mtime = os.path.getmtime(file_path) if isinstance(file_path, str) else None
+        return _load_data_cached(file_path, file_name, mtime)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return None
 
+# Parse the file once per (content, mtime); widget changes rerun the script
+# but hit the cache instead of re-parsing the spreadsheet
+@st.cache_data(
+    show_spinner="Loading HR data…",
+    max_entries=4,
+    hash_funcs={
+        "streamlit.runtime.uploaded_file_manager.UploadedFile":
+            lambda f: (f.name, f.size, hash(f.getvalue()))
+    }
+)
+def _load_data_cached(file_path, file_name, mtime):
+    """Parse an Excel or CSV file into a dataframe"""
+    reader = _read_csv if file_name.endswith('.csv') else _read_excel
+    
+    cache_path = _parquet_cache_path(file_path)
+    if cache_path and os.path.exists(cache_path):
+        df = _read_parquet_cache(cache_path)
+        if df is not None:
+            return df
+    
+    df = reader(file_path)
+    if cache_path:
+        df = _arrow_safe(df)
+        # Hand back the entry as read from disk so cold and warm loads of the
+        # same file get identical dtypes (parquet maps Arrow-backed strings to
+        # StringDtype, for instance)
+        if _write_parquet_cache(df, cache_path):
+            cached = _read_parquet_cache(cache_path)
+            if cached is not None:
+                return cached
+    return df
+
+# Function to make a parsed dataframe writable to parquet
+def _arrow_safe(df):
+    """Cast 'Pers' columns and mixed-type object columns to pyarrow strings"""
+    bad = [
+        col for col in df.columns
+        if ('Pers' in str(col) and not pd.api.types.is_string_dtype(df[col]))
+        or (df[col].dtype == object and not _arrow_ok(df[col], n=None))
+    ]
+    if not bad:
+        return df
+    return df.assign(**{str(col): df[col].astype("string[pyarrow]") for col in bad})
+
+# Function to locate the parquet side-cache entry for a file
+def _parquet_cache_path(source):
+    """Return the cache path keyed on the file's content hash, or None if disabled"""
+    if not PARQUET_CACHE_DIR:
+        return None
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            data = f.read()
+    else:
+        data = source.getvalue()
+    digest = hashlib.blake2b(data, digest_size=16)
+    # Pruned and full reads of the same file must not share an entry
+    digest.update(b'detected' if DETECTED_COLUMNS_ONLY else b'full')
+    return os.path.join(PARQUET_CACHE_DIR, f"{digest.hexdigest()}.parquet")
+
+# Function to read a parquet side-cache entry
+def _read_parquet_cache(path):
+    """Load a cached dataframe, or None if the entry is unreadable"""
+    try:
+        df = pd.read_parquet(path)
+    except Exception:
+        return None
+    # Touch the entry so pruning evicts the least recently used files first;
+    # best-effort, since another session may have pruned it in the meantime
+    with contextlib.suppress(OSError):
+        os.utime(path)
+    return df
+
+# Function to write a parquet side-cache entry
+def _write_parquet_cache(df, path):
+    """Persist a parsed dataframe, prune to the newest entries; True on success"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(PARQUET_CACHE_DIR, exist_ok=True)
+        df.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, path)
+        
+        cached = [os.path.join(PARQUET_CACHE_DIR, f) for f in os.listdir(PARQUET_CACHE_DIR) if f.endswith('.parquet')]
+        cached.sort(key=os.path.getmtime, reverse=True)
+        for stale in cached[PARQUET_CACHE_MAX_FILES:]:
+            os.remove(stale)
+        return True
+    except Exception as e:
+        # The side cache is best-effort; a failed write only means re-parsing later
+        logger.warning("Could not write parquet cache entry %s: %s", path, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+# Function to list filter options for a column; bounded because every upload
+# gets a fresh file_id key, so entries from old uploads are never reused
+@st.cache_data(show_spinner=False, max_entries=32, ttl=3600)
+def _filter_options(data_key, col, _df):
+    """Sorted unique values of a filter column, cached per dataset and column"""
+    values = _df[col]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return sorted(values.cat.categories.tolist())
+    return sorted(values.dropna().unique().tolist())
+
 # Function to create a metric card
 def metric_card(label, value, prefix="", suffix=""):
     """Create a styled metric card"""
@@ -123,168 +306,234 @@ def section_header(title, icon="📊"):
     """
     return html
 
+# Column-name patterns used by the detectors, matched against lowercased names
+_DEPT_RE = re.compile(r'department|dept|org|unit')
+_JOB_RE = re.compile(r'^(?=.*job)(?=.*(?:family|role|position))')
+_EMP_GROUP_RE = re.compile(r'^(?=.*employee)(?=.*group)|emp group')
+_JOIN_DATE_RE = re.compile(r'^(?=.*(?:join|hire|start))(?=.*date)')
+
+# Function to lowercase column names once for all detectors
+def _lower_cols(df):
+    """Return the dataframe's column names as a lowercased string array"""
+    return np.array([str(col).lower() for col in df.columns])
+
+# Function to find the first column whose lowercased name matches a pattern
+def _first_match(df, pattern, lower_cols=None):
+    """Return the first column matching pattern, or None"""
+    if lower_cols is None:
+        lower_cols = _lower_cols(df)
+    hits = np.flatnonzero([pattern.search(col) is not None for col in lower_cols])
+    return df.columns[hits[0]] if hits.size else None
+
 # Function to detect department column
-def detect_department_column(df):
+def detect_department_column(df, lower_cols=None):
     """Detect department column in dataframe"""
     if 'Department' in df.columns:
         return 'Department'
     elif 'Organizational Unit' in df.columns:
         return 'Organizational Unit'
-    else:
-        for col in df.columns:
-            col_str = str(col).lower()
-            if 'department' in col_str or 'dept' in col_str or 'org' in col_str or 'unit' in col_str:
-                return col
-    return None
+    return _first_match(df, _DEPT_RE, lower_cols)
 
 # Function to detect job family column
-def detect_job_family_column(df):
+def detect_job_family_column(df, lower_cols=None):
     """Detect job family column in dataframe"""
     if 'Job Family' in df.columns:
         return 'Job Family'
-    else:
-        for col in df.columns:
-            col_str = str(col).lower()
-            if 'job' in col_str and ('family' in col_str or 'role' in col_str or 'position' in col_str):
-                return col
-    return None
+    return _first_match(df, _JOB_RE, lower_cols)
 
 # Function to detect employee group column
-def detect_employee_group_column(df):
+def detect_employee_group_column(df, lower_cols=None):
     """Detect employee group column in dataframe"""
     if 'Employee Group' in df.columns:
         return 'Employee Group'
-    else:
-        for col in df.columns:
-            col_str = str(col).lower()
-            if ('employee' in col_str and 'group' in col_str) or 'employeegroup' in col_str or 'emp group' in col_str:
-                return col
-    return None
+    return _first_match(df, _EMP_GROUP_RE, lower_cols)
 
 # Function to detect joining date column
-def detect_joining_date_column(df):
+def detect_joining_date_column(df, lower_cols=None):
     """Detect joining date column in dataframe"""
     if 'Joining Date' in df.columns:
         return 'Joining Date'
-    else:
-        for col in df.columns:
-            col_str = str(col).lower()
-            if ('join' in col_str or 'hire' in col_str or 'start' in col_str) and 'date' in col_str:
-                return col
-    return None
+    return _first_match(df, _JOIN_DATE_RE, lower_cols)
+
+# Column name in pyarrow's "Conversion failed for column X with type Y" errors
+_ARROW_COLUMN_RE = re.compile(r"Conversion failed for column (.+?) with type")
+
+# Function to check whether a column converts to Arrow
+def _arrow_ok(series, n=32):
+    """Try converting the first n values (all if n is None) of a column to Arrow"""
+    try:
+        pa.array(series if n is None else series.head(n), from_pandas=True)
+        return True
+    except Exception:
+        return False
 
 # Function to safely display a dataframe
 def safe_dataframe_display(df):
     """Safely display a dataframe by converting problematic columns to strings"""
+    # Only object columns can hold the mixed types Arrow rejects; cast just those
+    bad = [col for col in df.columns if df[col].dtype == object and not _arrow_ok(df[col])]
+    if bad:
+        st.warning(f"Converting columns to string format for display compatibility: {', '.join(bad)}")
+        df = df.assign(**{col: df[col].astype("string[pyarrow]") for col in bad})
+    
     try:
-        # First attempt to display the original dataframe
         return st.dataframe(df, use_container_width=True)
     except Exception as e:
-        st.warning(f"Converting columns to string format for display compatibility: {str(e)}")
-        # Create a copy to avoid modifying the original dataframe
-        display_df = df.copy()
-        
-        # Convert all columns to strings to avoid PyArrow serialization issues
-        for col in display_df.columns:
-            try:
-                display_df[col] = display_df[col].astype(str)
-            except Exception as e:
-                st.warning(f"Error converting column {col}: {str(e)}")
-        
-        # Try again with converted dataframe
+        # The sample missed a bad value: cast only the column Arrow names, or
+        # the object columns if the message doesn't name one
+        match = _ARROW_COLUMN_RE.search(str(e))
+        if match and match.group(1) in df.columns:
+            retry = [match.group(1)]
+        else:
+            retry = [col for col in df.columns if df[col].dtype == object]
+        st.warning(f"Converting columns to string format for display compatibility: {', '.join(retry)}")
+        df = df.assign(**{col: df[col].astype("string[pyarrow]") for col in retry})
+    
+    try:
+        return st.dataframe(df, use_container_width=True)
+    except Exception as e:
+        st.error(f"Failed to display dataframe even after conversion: {str(e)}")
+        st.info("Displaying first 5 rows as text instead:")
+        st.text(str(df.head(5)))
+        return None
+
+# Function to count category codes and their percentages
+def _count_codes_numpy(codes, k):
+    """Count each of k category codes and its share of the total (1 decimal)"""
+    counts = np.bincount(codes, minlength=k)
+    pct = np.round(counts * 1000.0 / max(counts.sum(), 1)) / 10.0
+    return counts, pct
+
+# Function to count category codes with an explicit loop (numba target)
+def _count_codes_loop(codes, k):
+    """Count each of k category codes and its share of the total (1 decimal)"""
+    counts = np.zeros(k, dtype=np.int64)
+    for i in range(codes.size):
+        counts[codes[i]] += 1
+    total = max(counts.sum(), 1)
+    pct = np.empty(k, dtype=np.float64)
+    for j in range(k):
+        pct[j] = np.round(counts[j] * 1000.0 / total) / 10.0
+    return counts, pct
+
+# Counting kernel, resolved on first use: numba (optional) is imported lazily
+# so it doesn't slow startup, and the compiled kernel is cached on disk so the
+# compile cost is paid once per install rather than once per process
+_count_codes_kernel = None
+
+# Function to count category codes with the fastest available kernel
+def _count_codes(codes, k):
+    """Count codes with the numba kernel when available, else with NumPy"""
+    global _count_codes_kernel
+    if _count_codes_kernel is None:
         try:
-            return st.dataframe(display_df, use_container_width=True)
-        except Exception as e:
-            st.error(f"Failed to display dataframe even after conversion: {str(e)}")
-            st.info("Displaying first 5 rows as text instead:")
-            st.text(str(display_df.head(5)))
-            return None
+            from numba import njit
+            _count_codes_kernel = njit(cache=True)(_count_codes_loop)
+        except Exception:
+            _count_codes_kernel = _count_codes_numpy
+    try:
+        return _count_codes_kernel(codes, k)
+    except Exception:
+        # numba failed to compile or load its cache; stay on NumPy from here on
+        _count_codes_kernel = _count_codes_numpy
+        return _count_codes_numpy(codes, k)
+
+# Function to count categories with percentages and labels
+def _counts_with_pct(series):
+    """Count each category in a single pass, sorted ascending by count"""
+    codes, uniques = pd.factorize(series.dropna(), sort=False)
+    counts, pct = _count_codes(codes.astype(np.int64), len(uniques))
+    order = np.argsort(counts, kind='stable')
+    cats = np.asarray(uniques)[order]
+    counts = counts[order]
+    pct = pct[order]
+    labels = [f"{c} ({p}%)" for c, p in zip(counts.tolist(), pct.tolist())]
+    return pd.DataFrame({series.name: cats, 'Count': counts, 'Percentage': pct, 'Label': labels})
+
+# Function to hash the column(s) a chart is built from
+def _hash_chart_frame(df):
+    """Hash dataframe values (ignoring the index) for chart caching"""
+    return pd.util.hash_pandas_object(df, index=False).values.tobytes()
+
+# Chart builders receive only the column they plot and are cached on its
+# values, so widget changes that leave the column untouched skip the
+# aggregation (_counts_with_pct / year counting) and our figure build. They
+# return the fig.to_json() spec as a compact cache value; st.plotly_chart still
+# rebuilds, validates and serializes the figure on every render.
+cache_chart = st.cache_data(
+    show_spinner=False,
+    max_entries=32,
+    hash_funcs={pd.DataFrame: _hash_chart_frame}
+)
 
 # Function to create employees by department chart
+@cache_chart
 def create_employees_by_department(df, dept_col):
     """Create horizontal bar chart showing employees by department"""
     if dept_col is None:
         return None
     
     try:
-        # Count employees by department
-        dept_counts = df[dept_col].value_counts().reset_index()
-        dept_counts.columns = [dept_col, 'Count']
-        
-        # Calculate percentages
-        total = dept_counts['Count'].sum()
-        dept_counts['Percentage'] = (dept_counts['Count'] / total * 100).round(1)
+        import plotly.graph_objects as go
         
-        # Create text labels with count and percentage
-        dept_counts['Label'] = dept_counts['Count'].astype(str) + ' (' + dept_counts['Percentage'].astype(str) + '%)'
+        # Count employees by department, with percentages and labels
+        dept_counts = _counts_with_pct(df[dept_col])
         
-        # Sort by count descending
-        dept_counts = dept_counts.sort_values('Count', ascending=True)
-        
-        # Create horizontal bar chart
-        fig = px.bar(
-            dept_counts,
-            y=dept_col,
-            x='Count',
+        # Create horizontal bar chart with all trace properties set up front
+        fig = go.Figure(go.Bar(
+            x=dept_counts['Count'],
+            y=dept_counts[dept_col],
             orientation='h',
-            text='Label',
-            title=f'Employees by {dept_col}',
-            height=300
-        )
+            text=dept_counts['Label'],
+            textposition='outside',
+            customdata=dept_counts[['Percentage']],
+            hovertemplate=f'<b>{dept_col}:</b> %{{y}}<br><b>Count:</b> %{{x}}<br><b>Percentage:</b> %{{customdata[0]}}%<extra></extra>'
+        ))
         
         # Improve layout
         fig.update_layout(
+            title=dict(text=f'Employees by {dept_col}', x=0.5, font=dict(size=14)),
+            height=300,
             margin=dict(l=0, r=0, t=30, b=0),
-            title=dict(x=0.5, font=dict(size=14)),
             xaxis=dict(title=''),
             yaxis=dict(title='')
         )
         
-        # Update traces
-        fig.update_traces(
-            textposition='outside',
-            hovertemplate=f'<b>{dept_col}:</b> %{{y}}<br><b>Count:</b> %{{x}}<br><b>Percentage:</b> %{{customdata[0]}}%<extra></extra>',
-            customdata=dept_counts[['Percentage']]
-        )
-        
-        return fig
+        return fig.to_json()
     except Exception as e:
         st.warning(f"Error creating department chart: {str(e)}")
         return None
 
 # Function to create employee group split chart
+@cache_chart
 def create_employee_group_split(df, emp_group_col):
     """Create donut chart showing employee group split"""
     if emp_group_col is None:
         return None
     
     try:
-        # Count employees by group
-        group_counts = df[emp_group_col].value_counts().reset_index()
-        group_counts.columns = [emp_group_col, 'Count']
-        
-        # Calculate percentages
-        total = group_counts['Count'].sum()
-        group_counts['Percentage'] = (group_counts['Count'] / total * 100).round(1)
+        import plotly.graph_objects as go
         
-        # Create text labels with count and percentage
-        group_counts['Label'] = group_counts[emp_group_col] + '<br>' + group_counts['Count'].astype(str) + ' (' + group_counts['Percentage'].astype(str) + '%)'
+        # Count employees by group, with percentages and labels
+        group_counts = _counts_with_pct(df[emp_group_col])
+        group_counts['Label'] = [f"{g}<br>{label}" for g, label in zip(group_counts[emp_group_col].tolist(), group_counts['Label'].tolist())]
         
-        # Create donut chart
-        fig = px.pie(
-            group_counts,
-            names=emp_group_col,
-            values='Count',
-            title=f'{emp_group_col} Split',
+        # Create donut chart showing both count and percentage
+        fig = go.Figure(go.Pie(
+            labels=group_counts[emp_group_col],
+            values=group_counts['Count'],
             hole=0.4,
-            height=300,
-            custom_data=['Count', 'Percentage', 'Label']  # Include custom data for hover
-        )
+            customdata=group_counts[['Count', 'Percentage', 'Label']],  # Include custom data for hover
+            texttemplate='%{label}<br>%{value} (%{percent})',
+            textposition='inside',
+            hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>'
+        ))
         
         # Improve layout
         fig.update_layout(
+            title=dict(text=f'{emp_group_col} Split', x=0.5, font=dict(size=14)),
+            height=300,
             margin=dict(l=0, r=0, t=30, b=0),
-            title=dict(x=0.5, font=dict(size=14)),
             legend=dict(
                 orientation="h",
                 yanchor="bottom",
@@ -294,124 +543,223 @@ def create_employee_group_split(df, emp_group_col):
             )
         )
         
-        # Update traces to show both count and percentage
-        fig.update_traces(
-            texttemplate='%{label}<br>%{value} (%{percent})',
-            textposition='inside',
-            hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>'
-        )
-        
-        return fig
+        return fig.to_json()
     except Exception as e:
         st.warning(f"Error creating employee group chart: {str(e)}")
         return None
 
 # Function to create talent distribution by job family chart
+@cache_chart
 def create_talent_distribution(df, job_col):
     """Create horizontal bar chart showing talent distribution by job family"""
     if job_col is None:
         return None
     
     try:
-        # Count employees by job family
-        job_counts = df[job_col].value_counts().reset_index()
-        job_counts.columns = [job_col, 'Count']
-        
-        # Calculate percentages
-        total = job_counts['Count'].sum()
-        job_counts['Percentage'] = (job_counts['Count'] / total * 100).round(1)
+        import plotly.graph_objects as go
         
-        # Create text labels with count and percentage
-        job_counts['Label'] = job_counts['Count'].astype(str) + ' (' + job_counts['Percentage'].astype(str) + '%)'
+        # Count employees by job family, with percentages and labels
+        job_counts = _counts_with_pct(df[job_col])
         
-        # Sort by count descending
-        job_counts = job_counts.sort_values('Count', ascending=True)
-        
-        # Create horizontal bar chart
-        fig = px.bar(
-            job_counts,
-            y=job_col,
-            x='Count',
+        # Create horizontal bar chart with all trace properties set up front
+        fig = go.Figure(go.Bar(
+            x=job_counts['Count'],
+            y=job_counts[job_col],
             orientation='h',
-            text='Label',
-            title=f'Headcount by {job_col}',
-            height=400
-        )
+            text=job_counts['Label'],
+            textposition='outside',
+            customdata=job_counts[['Percentage']],
+            hovertemplate=f'<b>{job_col}:</b> %{{y}}<br><b>Count:</b> %{{x}}<br><b>Percentage:</b> %{{customdata[0]}}%<extra></extra>'
+        ))
         
         # Improve layout
         fig.update_layout(
+            title=dict(text=f'Headcount by {job_col}', x=0.5, font=dict(size=14)),
+            height=400,
             margin=dict(l=0, r=0, t=30, b=0),
-            title=dict(x=0.5, font=dict(size=14)),
             xaxis=dict(title=''),
             yaxis=dict(title='')
         )
         
-        # Update traces
-        fig.update_traces(
-            textposition='outside',
-            hovertemplate=f'<b>{job_col}:</b> %{{y}}<br><b>Count:</b> %{{x}}<br><b>Percentage:</b> %{{customdata[0]}}%<extra></extra>',
-            customdata=job_counts[['Percentage']]
-        )
-        
-        return fig
+        return fig.to_json()
     except Exception as e:
         st.warning(f"Error creating job family chart: {str(e)}")
         return None
 
 # Function to create tenure trend chart
+@cache_chart
 def create_tenure_trend(df, joining_date_col):
     """Create line chart showing hiring trend over years"""
     if joining_date_col is None:
         return None
     
     try:
-        # Convert joining date to datetime if not already
-        if not pd.api.types.is_datetime64_any_dtype(df[joining_date_col]):
-            df[joining_date_col] = pd.to_datetime(df[joining_date_col], errors='coerce')
-        
-        # Extract year and count hires by year
-        df['Join Year'] = df[joining_date_col].dt.year
-        hiring_trend = df.groupby('Join Year').size().reset_index(name='New Hires')
-        
-        # Create line chart
-        fig = px.line(
-            hiring_trend,
-            x='Join Year',
-            y='New Hires',
-            markers=True,
-            title='Hiring Trend Over Years',
-            height=300
-        )
+        import plotly.graph_objects as go
+        
+        # Truncate joining dates to years without touching the caller's dataframe
+        join_dates = pd.to_datetime(df[joining_date_col], errors='coerce')
+        if join_dates.dt.tz is not None:
+            # Keep local wall time so a hire is counted in its local year, not UTC's
+            join_dates = join_dates.dt.tz_localize(None)
+        join_years = join_dates.to_numpy('datetime64[Y]')
+        join_years = join_years[~np.isnat(join_years)].astype('int64') + 1970
+        
+        # Count hires by year
+        years, hires = np.unique(join_years, return_counts=True)
+        
+        # Create line chart with markers
+        fig = go.Figure(go.Scatter(
+            x=years,
+            y=hires,
+            mode='lines+markers',
+            texttemplate='%{y}',
+            textposition='top center',
+            hovertemplate='<b>Year:</b> %{x}<br><b>New Hires:</b> %{y}<extra></extra>'
+        ))
         
         # Improve layout
         fig.update_layout(
+            title=dict(text='Hiring Trend Over Years', x=0.5, font=dict(size=14)),
+            height=300,
             margin=dict(l=0, r=0, t=30, b=0),
-            title=dict(x=0.5, font=dict(size=14)),
             xaxis=dict(title=''),
             yaxis=dict(title='')
         )
         
-        # Update traces to show values on the chart
-        fig.update_traces(
-            texttemplate='%{y}',
-            textposition='top center',
-            hovertemplate='<b>Year:</b> %{x}<br><b>New Hires:</b> %{y}<extra></extra>'
-        )
-        
-        return fig
+        return fig.to_json()
     except Exception as e:
         st.warning(f"Error creating tenure trend chart: {str(e)}")
         return None
 
+# Function to render the filters, metrics and charts
+@st.fragment
+def render_dashboard(df, data_key, company_name, dept_col, job_col, emp_group_col, joining_date_col):
+    """Render the dashboard body; filter changes rerun only this fragment"""
+    from datetime import datetime
+    
+    # Reserve the title slot so it stays above the filters
+    title_placeholder = st.empty()
+    
+    # Add filters based on detected columns
+    filters_applied = False
+    
+    # Collect every selection first, then filter once with a combined mask
+    mask = None
+    filter_cols = [col for col in (dept_col, job_col, emp_group_col) if col]
+    if filter_cols:
+        with st.expander("🔎 Filter Employees", expanded=True):
+            for col, filter_col in zip(filter_cols, st.columns(len(filter_cols))):
+                try:
+                    options = _filter_options(data_key, col, df)
+                    selected = filter_col.multiselect(f"{col}", options=options)
+                    if selected:
+                        col_mask = df[col].isin(selected).to_numpy()
+                        mask = col_mask if mask is None else (mask & col_mask)
+                except Exception as e:
+                    filter_col.warning(f"Could not create filter for {col}: {str(e)}")
+    
+    if mask is not None:
+        df = df.loc[mask]
+        filters_applied = True
+    
+    # Headline figures, computed once for the title and metric cards
+    n_employees = len(df)
+    n_depts = df[dept_col].nunique() if dept_col else None
+    n_jobs = df[job_col].nunique() if job_col else None
+    
+    # Dashboard title
+    title_placeholder.markdown(f"""
+    <div class="dashboard-title">
+        <h1>Executive HR Analytics Dashboard</h1>
+        <p>{company_name} • {datetime.now().strftime('%B %d, %Y')} • {n_employees} employees {' (filtered)' if filters_applied else ''}</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Key HR Metrics
+    st.markdown(section_header("🔑 Key HR Metrics"), unsafe_allow_html=True)
+    
+    metric_col1, metric_col2, metric_col3 = st.columns(3)
+    
+    with metric_col1:
+        st.markdown(metric_card("Total Employees", f"{n_employees:,}"), unsafe_allow_html=True)
+    
+    with metric_col2:
+        if dept_col:
+            st.markdown(metric_card(f"Total {dept_col}s", f"{n_depts:,}"), unsafe_allow_html=True)
+        else:
+            st.markdown(metric_card("Departments", "N/A"), unsafe_allow_html=True)
+    
+    with metric_col3:
+        if job_col:
+            st.markdown(metric_card(f"Total {job_col}s", f"{n_jobs:,}"), unsafe_allow_html=True)
+        else:
+            st.markdown(metric_card("Job Families", "N/A"), unsafe_allow_html=True)
+    
+    st.markdown("<hr>", unsafe_allow_html=True)
+    
+    # Workforce Overview
+    st.markdown(section_header("👥 Workforce Overview"), unsafe_allow_html=True)
+    
+    overview_col1, overview_col2 = st.columns(2)
+    
+    with overview_col1:
+        if dept_col:
+            dept_fig = create_employees_by_department(df[[dept_col]], dept_col)
+            if dept_fig:
+                st.plotly_chart(json.loads(dept_fig), use_container_width=True, key="dept_overview")
+        else:
+            st.info("Department column not detected in the data.")
+    
+    with overview_col2:
+        if emp_group_col:
+            group_fig = create_employee_group_split(df[[emp_group_col]], emp_group_col)
+            if group_fig:
+                st.plotly_chart(json.loads(group_fig), use_container_width=True, key="group_split")
+        else:
+            st.info("Employee Group column not detected in the data.")
+    
+    st.markdown("<hr>", unsafe_allow_html=True)
+    
+    # Talent Distribution
+    st.markdown(section_header("🎯 Talent Distribution by Job Family"), unsafe_allow_html=True)
+    
+    if job_col:
+        job_fig = create_talent_distribution(df[[job_col]], job_col)
+        if job_fig:
+            st.plotly_chart(json.loads(job_fig), use_container_width=True, key="job_dist")
+    else:
+        st.info("Job Family column not detected in the data.")
+    
+    st.markdown("<hr>", unsafe_allow_html=True)
+    
+    # Tenure Trend
+    st.markdown(section_header("📅 Tenure Trend"), unsafe_allow_html=True)
+    
+    if joining_date_col:
+        tenure_fig = create_tenure_trend(df[[joining_date_col]], joining_date_col)
+        if tenure_fig:
+            st.plotly_chart(json.loads(tenure_fig), use_container_width=True, key="tenure_trend")
+    else:
+        st.info("Joining Date column not detected in the data.")
+    
+    st.markdown("<hr>", unsafe_allow_html=True)
+    
+    # Detailed Employee Table
+    st.markdown(section_header("📋 Detailed Employee Table"), unsafe_allow_html=True)
+    
+    # Display the dataframe using the safe display function
+    safe_dataframe_display(df)
+    
+    # Footer
+    st.markdown("<hr>", unsafe_allow_html=True)
+    st.caption("🚀 Built to showcase HR insights that fuel performance & promotion opportunities ✨")
+
 # Main function
 def main():
     # Apply custom CSS
     apply_custom_css()
     
-    # Sidebar for filters and options
-    st.sidebar.title("🔎 Filter Employees")
-    
-    # Data upload
+    # Sidebar for data upload and options; filters live in the dashboard body
     st.sidebar.header("Dashboard Controls")
     st.sidebar.subheader("Upload HR Data")
     uploaded_file = st.sidebar.file_uploader("Drag and drop file here", type=["CSV", "XLSX", "XLS"], key="data_uploader")
@@ -422,6 +770,9 @@ def main():
     # Load data
     if uploaded_file is not None:
         df = load_data(uploaded_file)
+        # Identifies this upload for caches that take the dataframe unhashed;
+        # Streamlit assigns a new file_id to every upload, so nothing is rehashed
+        data_key = uploaded_file.file_id
     else:
         st.warning("Please upload an HR data file to continue.")
         df = None
@@ -430,25 +781,23 @@ def main():
     if df is not None:
         # Pre-process dataframe to prevent PyArrow serialization errors
         try:
-            # Make a copy to avoid modifying the original
-            df_processed = df.copy()
-            
-            # Specifically handle the 'Pers.No.' column if it exists
-            if 'Pers.No.' in df_processed.columns:
-                st.sidebar.info("Found 'Pers.No.' column - converting to string type")
-                df_processed['Pers.No.'] = df_processed['Pers.No.'].astype(str)
-            
-            # Check for any column with 'Pers' in the name
-            for col in df_processed.columns:
-                if 'Pers' in str(col):
-                    st.sidebar.info(f"Found column '{col}' - converting to string type")
-                    df_processed[col] = df_processed[col].astype(str)
+            # load_data hands back a fresh frame from the cache, so it is
+            # safe to modify in place instead of copying it first
             
-            # Convert all column names to strings
-            df_processed.columns = [str(col) for col in df_processed.columns]
+            # Convert all column names to strings and collect every column
+            # with 'Pers' in the name (including 'Pers.No.') in one pass
+            new_cols, to_str = [], []
+            for col in df.columns:
+                name = str(col)
+                new_cols.append(name)
+                if 'Pers' in name:
+                    to_str.append(name)
+            df.columns = new_cols
             
-            # Use the processed dataframe for all operations
-            df = df_processed
+            # Store the 'Pers' columns as pyarrow strings in a single cast
+            if to_str:
+                df[to_str] = df[to_str].astype("string[pyarrow]")
+                st.sidebar.info(f"Converted {len(to_str)} Pers* columns to string type: {', '.join(to_str)}")
             st.sidebar.success("Data pre-processing completed successfully")
         except Exception as e:
             st.sidebar.warning(f"Error during pre-processing: {str(e)}")
@@ -464,10 +813,17 @@ def main():
             st.dataframe(dtypes_df)
         
         # Detect columns
-        dept_col = detect_department_column(df)
-        job_col = detect_job_family_column(df)
-        emp_group_col = detect_employee_group_column(df)
-        joining_date_col = detect_joining_date_column(df)
+        lower_cols = _lower_cols(df)
+        dept_col = detect_department_column(df, lower_cols)
+        job_col = detect_job_family_column(df, lower_cols)
+        emp_group_col = detect_employee_group_column(df, lower_cols)
+        joining_date_col = detect_joining_date_column(df, lower_cols)
+        
+        # Store the low-cardinality filter columns as categories so counting,
+        # unique values and isin all work on integer codes
+        for col in (dept_col, job_col, emp_group_col):
+            if col and (df[col].dtype == object or pd.api.types.is_string_dtype(df[col])):
+                df[col] = df[col].astype('category')
         
         # Show detected columns in an expander
         with st.sidebar.expander("View Detected Columns"):
@@ -476,125 +832,8 @@ def main():
             st.write(f"Employee Group Column: {emp_group_col}")
             st.write(f"Joining Date Column: {joining_date_col}")
         
-        # Add filters based on detected columns
-        filters_applied = False
-        
-        if dept_col:
-            try:
-                dept_options = sorted(df[dept_col].dropna().unique())
-                selected_depts = st.sidebar.multiselect(f"{dept_col}", options=dept_options)
-                if selected_depts:
-                    df = df[df[dept_col].isin(selected_depts)]
-                    filters_applied = True
-            except Exception as e:
-                st.sidebar.warning(f"Could not create filter for {dept_col}: {str(e)}")
-        
-        if job_col:
-            try:
-                job_options = sorted(df[job_col].dropna().unique())
-                selected_jobs = st.sidebar.multiselect(f"{job_col}", options=job_options)
-                if selected_jobs:
-                    df = df[df[job_col].isin(selected_jobs)]
-                    filters_applied = True
-            except Exception as e:
-                st.sidebar.warning(f"Could not create filter for {job_col}: {str(e)}")
-        
-        if emp_group_col:
-            try:
-                group_options = sorted(df[emp_group_col].dropna().unique())
-                selected_groups = st.sidebar.multiselect(f"{emp_group_col}", options=group_options)
-                if selected_groups:
-                    df = df[df[emp_group_col].isin(selected_groups)]
-                    filters_applied = True
-            except Exception as e:
-                st.sidebar.warning(f"Could not create filter for {emp_group_col}: {str(e)}")
-        
-        # Dashboard title
-        st.markdown(f"""
-        <div class="dashboard-title">
-            <h1>Executive HR Analytics Dashboard</h1>
-            <p>{company_name} • {datetime.now().strftime('%B %d, %Y')} • {len(df)} employees {' (filtered)' if filters_applied else ''}</p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Key HR Metrics
-        st.markdown(section_header("🔑 Key HR Metrics"), unsafe_allow_html=True)
-        
-        metric_col1, metric_col2, metric_col3 = st.columns(3)
-        
-        with metric_col1:
-            st.markdown(metric_card("Total Employees", f"{len(df):,}"), unsafe_allow_html=True)
-        
-        with metric_col2:
-            if dept_col:
-                st.markdown(metric_card(f"Total {dept_col}s", f"{df[dept_col].nunique():,}"), unsafe_allow_html=True)
-            else:
-                st.markdown(metric_card("Departments", "N/A"), unsafe_allow_html=True)
-        
-        with metric_col3:
-            if job_col:
-                st.markdown(metric_card(f"Total {job_col}s", f"{df[job_col].nunique():,}"), unsafe_allow_html=True)
-            else:
-                st.markdown(metric_card("Job Families", "N/A"), unsafe_allow_html=True)
-        
-        st.markdown("<hr>", unsafe_allow_html=True)
-        
-        # Workforce Overview
-        st.markdown(section_header("👥 Workforce Overview"), unsafe_allow_html=True)
-        
-        overview_col1, overview_col2 = st.columns(2)
-        
-        with overview_col1:
-            if dept_col:
-                dept_fig = create_employees_by_department(df, dept_col)
-                if dept_fig:
-                    st.plotly_chart(dept_fig, use_container_width=True, key="dept_overview")
-            else:
-                st.info("Department column not detected in the data.")
-        
-        with overview_col2:
-            if emp_group_col:
-                group_fig = create_employee_group_split(df, emp_group_col)
-                if group_fig:
-                    st.plotly_chart(group_fig, use_container_width=True, key="group_split")
-            else:
-                st.info("Employee Group column not detected in the data.")
-        
-        st.markdown("<hr>", unsafe_allow_html=True)
-        
-        # Talent Distribution
-        st.markdown(section_header("🎯 Talent Distribution by Job Family"), unsafe_allow_html=True)
-        
-        if job_col:
-            job_fig = create_talent_distribution(df, job_col)
-            if job_fig:
-                st.plotly_chart(job_fig, use_container_width=True, key="job_dist")
-        else:
-            st.info("Job Family column not detected in the data.")
-        
-        st.markdown("<hr>", unsafe_allow_html=True)
-        
-        # Tenure Trend
-        st.markdown(section_header("📅 Tenure Trend"), unsafe_allow_html=True)
-        
-        if joining_date_col:
-            tenure_fig = create_tenure_trend(df, joining_date_col)
-            if tenure_fig:
-                st.plotly_chart(tenure_fig, use_container_width=True, key="tenure_trend")
-        else:
-            st.info("Joining Date column not detected in the data.")
-        
-        st.markdown("<hr>", unsafe_allow_html=True)
-        
-        # Detailed Employee Table
-        st.markdown(section_header("📋 Detailed Employee Table"), unsafe_allow_html=True)
-        
-        # Display the dataframe using the safe display function
-        safe_dataframe_display(df)
-        
-        # Footer
-        st.markdown("<hr>", unsafe_allow_html=True)
-        st.caption("🚀 Built to showcase HR insights that fuel performance & promotion opportunities ✨")
+        # Filters, metrics and charts rerun on their own when a filter changes
+        render_dashboard(df, data_key, company_name, dept_col, job_col, emp_group_col, joining_date_col)
     
     else:
         st.info("Please upload an HR data file to view the dashboard.")